@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import math
+import sqlite3
+import threading
+import argparse
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+DB_PATH = os.getenv('ALERTS_DB_PATH', os.path.join(os.path.dirname(__file__), 'alerts.db'))
+FIRINGS_PATH = os.path.join(os.path.dirname(__file__), 'alert_firings.jsonl')
+DIRECTIONS = ('below', 'above')
+# forecast horizons, in days, that every refresh provides (the served 7/30-day predictions)
+ALERT_HORIZONS = (7, 30)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    material TEXT NOT NULL,
+    location TEXT NOT NULL DEFAULT '',
+    horizon INTEGER NOT NULL,
+    direction TEXT NOT NULL,
+    threshold REAL NOT NULL,
+    created TEXT NOT NULL,
+    fired_at TEXT,
+    fired_value REAL
+);
+DROP INDEX IF EXISTS idx_alerts_active;
+CREATE INDEX IF NOT EXISTS idx_alerts_pending
+    ON alerts (material, location, horizon, direction, threshold) WHERE fired_at IS NULL;
+"""
+FIELDS = ('id', 'material', 'location', 'horizon', 'direction', 'threshold', 'created')
+
+# pending alerts of one group crossed by a forecast value: a range scan on
+# the partial index, so the cost follows the matches, not the alert count
+CROSSED_SQL = {
+    direction: f"""
+SELECT {', '.join(FIELDS)} FROM alerts
+WHERE material = :material AND location = :location AND horizon = :horizon
+  AND direction = '{direction}' AND threshold {op} :value AND fired_at IS NULL
+"""
+    for direction, op in (('below', '>'), ('above', '<'))
+}
+
+
+class FileSink:
+    """Append each firing as one JSON line."""
+
+    def __init__(self, path=FIRINGS_PATH):
+        self.path = path
+
+    def send(self, firings):
+        with open(self.path, 'a') as f:
+            for firing in firings:
+                f.write(json.dumps(firing) + '\n')
+
+
+class WebhookSink:
+    """POST firings as a JSON list to a webhook URL."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, firings):
+        body = json.dumps(firings).encode('utf-8')
+        req = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+def sink_from_env():
+    """ALERT_SINK is a file path or an http(s) URL; defaults to alert_firings.jsonl."""
+    target = os.getenv('ALERT_SINK', FIRINGS_PATH)
+    if target.startswith(('http://', 'https://')):
+        return WebhookSink(target)
+    return FileSink(target)
+
+
+class AlertEngine:
+    """Price alerts stored in SQLite, shared by every worker process.
+
+    Pending alerts are indexed by material, location, horizon, direction and
+    threshold, so a forecast value finds every alert it crosses with one range
+    scan per group: 'below' alerts fire for thresholds above the value,
+    'above' alerts for thresholds under it. Alerts fire once: a firing is
+    claimed with a conditional UPDATE, so when several workers evaluate at
+    the same time each alert is sent by exactly one of them.
+    """
+
+    def __init__(self, path=DB_PATH, sink=None):
+        self.path = path
+        self.sink = sink if sink is not None else sink_from_env()
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def validate(material, horizon, direction, threshold, location=''):
+        if not isinstance(material, str) or not material.strip():
+            raise ValueError('material is required')
+        material = material.strip().lower()
+        location = '' if location is None else location
+        if direction not in DIRECTIONS:
+            raise ValueError(f'direction must be one of {DIRECTIONS}')
+        if isinstance(horizon, bool) or isinstance(threshold, bool):
+            raise ValueError('horizon and threshold must be numbers')
+        try:
+            horizon, threshold = float(horizon), float(threshold)
+        except (TypeError, ValueError):
+            raise ValueError('horizon and threshold must be numbers')
+        if not horizon.is_integer() or int(horizon) not in ALERT_HORIZONS:
+            raise ValueError(f'horizon must be one of {ALERT_HORIZONS} days')
+        if not math.isfinite(threshold) or threshold <= 0:
+            raise ValueError('threshold must be a positive finite number')
+        if not isinstance(location, str):
+            raise ValueError('location must be a string')
+        return material, location.strip(), int(horizon), direction, threshold
+
+    def add_many(self, specs):
+        """Register alerts from (material, location, horizon, direction, threshold) tuples."""
+        created = datetime.now().isoformat(timespec='seconds')
+        specs = [self.validate(m, h, d, t, loc) for m, loc, h, d, t in specs]
+        added = []
+        with self._conn() as conn:
+            cur = conn.cursor()
+            # AUTOINCREMENT never reuses the id of a deleted alert
+            for m, loc, h, d, t in specs:
+                cur.execute('INSERT INTO alerts (material, location, horizon, direction, threshold, '
+                            'created) VALUES (?,?,?,?,?,?)', (m, loc, h, d, t, created))
+                added.append(dict(zip(FIELDS, (cur.lastrowid, m, loc, h, d, t, created))))
+        return added
+
+    def add(self, material, horizon, direction, threshold, location=''):
+        return self.add_many([(material, location, horizon, direction, threshold)])[0]
+
+    def remove(self, alert_id):
+        """Delete a pending alert; False if it does not exist or has already fired."""
+        with self._conn() as conn:
+            cur = conn.execute('DELETE FROM alerts WHERE id = ? AND fired_at IS NULL', (alert_id,))
+        return cur.rowcount == 1
+
+    def list(self, material=None):
+        sql = f'SELECT {", ".join(FIELDS)} FROM alerts WHERE fired_at IS NULL'
+        params = ()
+        if material is not None:
+            sql, params = sql + ' AND material = ?', (material,)
+        rows = self._conn().execute(sql + ' ORDER BY id', params).fetchall()
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+    def count(self):
+        """Number of pending alerts."""
+        return self._conn().execute('SELECT COUNT(*) FROM alerts WHERE fired_at IS NULL').fetchone()[0]
+
+    def evaluate(self, material, forecasts):
+        """Fire every alert on `material` crossed by a forecast.
+
+        `forecasts` maps (location, horizon) to a forecast price; location ''
+        is the material-wide forecast. Returns the firings sent to the sink; if
+        the sink fails the alerts stay active and the error propagates.
+        """
+        fired_at = datetime.now().isoformat(timespec='seconds')
+        conn = self._conn()
+        crossed = []
+        for (location, horizon), value in forecasts.items():
+            if value is None:
+                continue
+            for direction, sql in CROSSED_SQL.items():
+                rows = conn.execute(sql, {'material': material, 'location': location,
+                                          'horizon': horizon, 'value': value}).fetchall()
+                crossed.extend(dict(zip(FIELDS, row), forecast=round(value, 2), fired_at=fired_at)
+                               for row in rows)
+        if not crossed:
+            return crossed
+        # another worker may have fired or deleted an alert since the read;
+        # only alerts whose claim succeeds here are sent
+        firings = []
+        with conn:
+            for f in crossed:
+                cur = conn.execute('UPDATE alerts SET fired_at = ?, fired_value = ? '
+                                   'WHERE id = ? AND fired_at IS NULL', (fired_at, f['forecast'], f['id']))
+                if cur.rowcount == 1:
+                    firings.append(f)
+        if not firings:
+            return firings
+        try:
+            self.sink.send(firings)
+        except Exception:
+            # release the claims so the next evaluation retries them
+            with conn:
+                conn.executemany('UPDATE alerts SET fired_at = NULL, fired_value = NULL WHERE id = ?',
+                                 [(f['id'],) for f in firings])
+            raise
+        return firings
+
+    def evaluate_all(self, forecasts_by_material):
+        firings = []
+        for material, forecasts in forecasts_by_material.items():
+            firings.extend(self.evaluate(material, forecasts))
+        return firings
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        for firing in json.loads(body or b'[]'):
+            print('ALERT', json.dumps(firing))
+        sys.stdout.flush()
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve_webhook(port):
+    """Local stand-in for a notification webhook that prints what it receives."""
+    server = HTTPServer(('127.0.0.1', port), _WebhookHandler)
+    print(f'Webhook stand-in listening on http://127.0.0.1:{port}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Price alert utilities.')
+    parser.add_argument('--serve-webhook', type=int, metavar='PORT', default=8765,
+                        help='run a local webhook stand-in (default port 8765)')
+    serve_webhook(parser.parse_args().serve_webhook)
@@ -5,6 +5,9 @@ import os
 import pandas as pd
 import requests
 from datetime import datetime, timedelta
+from rollups import RollupStore, parse_range, MAX_POINTS
+from forecast_archive import ForecastArchive, MAX_WINDOW, infer_step_days
+from alerts import AlertEngine, ALERT_HORIZONS
 
 app = Flask(__name__)
 CORS(app, origins=["https://infosphere-innovators.github.io"])  # Allow CORS for GitHub Pages frontend
@@ -96,12 +99,16 @@ materials = {
 # Load trained models if present
 MODELS_DIR = os.path.join(os.path.dirname(__file__), 'models')
 loaded_models = {}
+model_versions = {}
 if os.path.isdir(MODELS_DIR):
     for fname in os.listdir(MODELS_DIR):
         if fname.endswith('.joblib'):
             key = fname.replace('.joblib','')
             try:
                 loaded_models[key] = load(os.path.join(MODELS_DIR, fname))
+                # identify a trained model by when its file was written
+                mtime = os.path.getmtime(os.path.join(MODELS_DIR, fname))
+                model_versions[key] = f"{key}-{datetime.fromtimestamp(mtime):%Y%m%d%H%M}"
                 print('Loaded model for', key)
             except Exception as e:
                 print('Failed to load', fname, e)
@@ -135,6 +142,60 @@ def get_historical_for_material(material, days=60):
         return [], []
 
 
+# Precomputed daily/weekly/monthly rollups for /history, synced incrementally
+# with rows appended to the dataset
+DATASET_PATH = os.path.join(os.path.dirname(__file__), '..', 'davaobuild_dataset_2025_2026.csv')
+history_store = RollupStore()
+
+
+@app.route("/history/<material>")
+def history(material):
+    """Return OHLC/mean rollups for charting, downsampled to a bounded number of points"""
+    try:
+        days = parse_range(request.args.get('range', '1y'))
+        max_points = max(3, min(int(request.args.get('points', MAX_POINTS)), MAX_POINTS))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    resolution = request.args.get('resolution', 'auto')
+    history_store.sync_csv(DATASET_PATH)
+    try:
+        data = history_store.query(material, days=days, resolution=resolution, max_points=max_points)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if data is None:
+        return jsonify({"error": "Material not found"}), 404
+    return jsonify(data)
+
+
+# Every served model forecast is archived and later scored against realized prices
+forecast_archive = ForecastArchive()
+
+
+def sync_realized(material):
+    """Copy daily mean prices newer than the archive's latest into it"""
+    history_store.sync_csv(DATASET_PATH)
+    since = forecast_archive.last_realized(material)
+    forecast_archive.record_realized(material, history_store.daily_means(material, since))
+
+
+@app.route("/accuracy/<material>")
+def accuracy(material):
+    """Return rolling realized-vs-predicted accuracy and drift for archived forecasts"""
+    try:
+        window = int(request.args.get('window', 30))
+        horizons = [int(h) for h in request.args.get('horizons', '7,30').split(',') if h]
+    except ValueError:
+        return jsonify({"error": "window and horizons must be integers"}), 400
+    if not 1 <= window <= MAX_WINDOW:
+        return jsonify({"error": f"window must be between 1 and {MAX_WINDOW} days"}), 400
+    if not horizons or min(horizons) < 1:
+        return jsonify({"error": "horizons must be positive"}), 400
+    if material not in materials:
+        return jsonify({"error": "Material not found"}), 404
+    sync_realized(material)
+    return jsonify(forecast_archive.accuracy(material, horizons=horizons, window=window))
+
+
 @app.route("/predict/<material>")
 def predict(material):
     # If a trained model exists use it; otherwise fall back to sample data
@@ -172,6 +233,13 @@ def predict(material):
         trend = 'up' if pred_30 > current_price else 'down' if pred_30 < current_price else 'stable'
         conf_min = round(min(forecast[:30]) * 0.98,2)
         conf_max = round(max(forecast[:30]) * 1.02,2)
+        try:
+            observed = [datetime.strptime(d, '%Y-%m-%d').date() for d in dates]
+            forecast_archive.record_forecast(material, model_versions.get(material, material),
+                                             datetime.now().date(), observed[-1], forecast,
+                                             step_days=infer_step_days(observed))
+        except Exception as e:
+            print(f"Forecast archive write failed: {e}")
         return jsonify({
             "current_price": round(current_price,2),
             "pred_7d": round(pred_7,2),
@@ -206,6 +274,102 @@ def predict(material):
 
 
 
+# Price alerts, evaluated in one batch per material after each data or model refresh
+alert_engine = AlertEngine()
+
+
+def location_factors():
+    """Price level of each location relative to its material's average, from recent EWMA levels"""
+    history_store.sync_csv(DATASET_PATH)
+    factors = {}
+    for material, locs in history_store.location_levels().items():
+        avg = sum(locs.values()) / len(locs)
+        factors[material] = {loc: level / avg for loc, level in locs.items()} if avg else {}
+    return factors
+
+
+def resolve_location(material, location, factors):
+    """Accept a full location name or its short form, e.g. 'Toril' for 'Davao City - Toril'"""
+    if location is None or location == '':
+        return ''
+    if not isinstance(location, str):
+        raise ValueError("location must be a string")
+    known = factors.get(material, {})
+    for name in known:
+        if location.strip().lower() in (name.lower(), name.split(' - ')[-1].lower()):
+            return name
+    raise ValueError(f"unknown location for {material}: {location}")
+
+
+def current_forecasts():
+    """Forecast per (location, horizon in days) for every material; location '' is material-wide"""
+    from train_models import iterative_forecast
+    factors = location_factors()
+    result = {}
+    for material, info in materials.items():
+        model = loaded_models.get(material)
+        dates, prices = get_historical_for_material(material, days=90) if model else ([], [])
+        if prices:
+            forecast = iterative_forecast(model, [float(p) for p in prices], steps=30)
+            # each step is one spacing of the (weekly) series; use the first step at or beyond h days
+            step = infer_step_days([datetime.strptime(d, '%Y-%m-%d').date() for d in dates])
+            by_horizon = {h: forecast[min(-(-h // step), len(forecast)) - 1] for h in ALERT_HORIZONS}
+        else:
+            by_horizon = {7: info["predicted_7"], 30: info["predicted_30"]}
+        values = {}
+        for h, p in by_horizon.items():
+            values[('', h)] = p
+            for loc, factor in factors.get(material, {}).items():
+                values[(loc, h)] = p * factor
+        result[material] = values
+    return result
+
+
+@app.route("/alerts", methods=["GET"])
+def list_alerts():
+    return jsonify(alert_engine.list(request.args.get("material")))
+
+
+@app.route("/alerts", methods=["POST"])
+def create_alert():
+    """Register an alert, e.g. {"material": "cement", "location": "Toril", "horizon": 30,
+    "direction": "below", "threshold": 240}"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "request body must be a JSON object"}), 400
+    material = data.get("material")
+    if not isinstance(material, str):
+        return jsonify({"error": "material must be a string"}), 400
+    material = material.strip().lower()
+    if material not in materials:
+        return jsonify({"error": "Material not found"}), 404
+    try:
+        location = resolve_location(material, data.get("location"), location_factors())
+        alert = alert_engine.add(material, data.get("horizon", 30), data.get("direction", "below"),
+                                 data.get("threshold"), location)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(alert), 201
+
+
+@app.route("/alerts/<int:alert_id>", methods=["DELETE"])
+def delete_alert(alert_id):
+    if not alert_engine.remove(alert_id):
+        return jsonify({"error": "Alert not found"}), 404
+    return jsonify({"deleted": alert_id})
+
+
+@app.route("/alerts/evaluate", methods=["POST"])
+def evaluate_alerts():
+    """Run all active alerts against fresh forecasts; call after ingesting data or retraining"""
+    try:
+        firings = alert_engine.evaluate_all(current_forecasts())
+    except Exception as e:
+        print(f"Alert evaluation failed: {e}")
+        return jsonify({"error": "Alert evaluation failed"}), 500
+    return jsonify({"fired": len(firings), "active": alert_engine.count(), "firings": firings})
+
+
 @app.route("/estimate", methods=["POST"])
 def estimate():
     data = request.json
@@ -372,6 +536,11 @@ def list_materials_today():
         print(f"Error fetching materials-today: {e}")
         return list_materials()
 
+# External data sources for the footer; overridable so load tests can point them at local stubs
+BSP_RATES_URL = os.getenv('BSP_RATES_URL', "https://www.bsp.gov.ph/statistics/external/json/rates.json")
+PSA_CPI_URL = os.getenv('PSA_CPI_URL', "http://api.psa.gov.ph/latest/CPI")
+
+
 @app.route("/footer-data")
 def footer_data():
     """Return live footer metrics (diesel, exchange rate, inflation, status)"""
@@ -382,8 +551,7 @@ def footer_data():
     # Try to fetch live exchange rate from BSP API
     try:
         # BSP JSON API for exchange rates
-        bsp_url = "https://www.bsp.gov.ph/statistics/external/json/rates.json"
-        resp = requests.get(bsp_url, timeout=5)
+        resp = requests.get(BSP_RATES_URL, timeout=5)
         if resp.status_code == 200:
             data = resp.json()
             # Look for USD rate (format varies but typically has "USD" key or array)
@@ -412,8 +580,7 @@ def footer_data():
     # Try to fetch inflation from PSA Open Data API
     try:
         # PSA Open Data Portal API for inflation
-        psa_url = "http://api.psa.gov.ph/latest/CPI"
-        resp = requests.get(psa_url, timeout=5)
+        resp = requests.get(PSA_CPI_URL, timeout=5)
         if resp.status_code == 200:
             data = resp.json()
             # Parse inflation data depending on PSA API structure
@@ -0,0 +1,103 @@
+"""Benchmark alert registration and batch evaluation with 100k alerts.
+
+    python backend/bench_alerts.py [--alerts 100000] [--refreshes 20]
+
+Compares the indexed AlertEngine.evaluate, which range-scans SQLite, against
+scanning an in-memory list of every alert.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from alerts import AlertEngine
+
+MATERIALS = ['steel', 'cement', 'sand', 'gravel', 'lumber', 'plywood']
+LOCATIONS = ['', 'Davao City - Buhangin', 'Davao City - Calinan', 'Davao City - Mintal',
+             'Davao City - Panacan', 'Davao City - Poblacion', 'Davao City - Talomo',
+             'Davao City - Toril']
+BASE_PRICE = {'steel': 190, 'cement': 250, 'sand': 85, 'gravel': 72, 'lumber': 98, 'plywood': 830}
+
+
+class NullSink:
+    def send(self, firings):
+        pass
+
+
+def make_specs(n, rng):
+    specs = []
+    for _ in range(n):
+        m = rng.choice(MATERIALS)
+        direction = rng.choice(('below', 'above'))
+        # buyers set thresholds on the far side of today's price
+        if direction == 'below':
+            threshold = BASE_PRICE[m] * rng.uniform(0.7, 0.99)
+        else:
+            threshold = BASE_PRICE[m] * rng.uniform(1.01, 1.3)
+        specs.append((m, rng.choice(LOCATIONS), rng.choice((7, 30)), direction, round(threshold, 2)))
+    return specs
+
+
+def make_forecasts(rng, drift):
+    forecasts = {}
+    for m in MATERIALS:
+        values = {}
+        for loc in LOCATIONS:
+            for h in (7, 30):
+                values[(loc, h)] = BASE_PRICE[m] * (1 + drift + rng.uniform(-0.01, 0.01))
+        forecasts[m] = values
+    return forecasts
+
+
+def linear_scan(alerts, forecasts):
+    fired = 0
+    for a in alerts:
+        value = forecasts[a['material']].get((a['location'], a['horizon']))
+        if value is None:
+            continue
+        if (a['direction'] == 'below' and value < a['threshold']) or \
+                (a['direction'] == 'above' and value > a['threshold']):
+            fired += 1
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--alerts', type=int, default=100000)
+    parser.add_argument('--refreshes', type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = AlertEngine(os.path.join(tmp, 'alerts.db'), sink=NullSink())
+        specs = make_specs(args.alerts, rng)
+        t = time.perf_counter()
+        engine.add_many(specs)
+        print(f'registered {args.alerts} alerts in {time.perf_counter() - t:.2f}s')
+
+        t = time.perf_counter()
+        active = engine.list()
+        print(f'listed {len(active)} active alerts in {time.perf_counter() - t:.2f}s')
+
+        scan_time = eval_time = 0.0
+        fired = 0
+        for i in range(args.refreshes):
+            # prices wander a little each refresh, crossing a few thresholds
+            forecasts = make_forecasts(rng, drift=0.005 * (i % 5 - 2))
+            snapshot = engine.list()
+            t = time.perf_counter()
+            linear_scan(snapshot, forecasts)
+            scan_time += time.perf_counter() - t
+            t = time.perf_counter()
+            fired += len(engine.evaluate_all(forecasts))
+            eval_time += time.perf_counter() - t
+
+        print(f'{args.refreshes} refreshes: {fired} firings, {engine.count()} alerts still active')
+        print(f'indexed evaluate: {eval_time / args.refreshes * 1000:.2f} ms/refresh')
+        print(f'linear scan:      {scan_time / args.refreshes * 1000:.2f} ms/refresh')
+        engine._conn().close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Time ForecastArchive writes and accuracy queries on a large archive.
+
+    python backend/bench_forecast_archive.py [--days 2000]
+
+Six materials x two model versions x 30 steps per issued day, so the
+default builds an archive of about 720k forecast rows.
+"""
+import os
+import time
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+from forecast_archive import ForecastArchive
+
+MATERIALS = ['steel', 'cement', 'sand', 'gravel', 'lumber', 'plywood']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=2000, help='issued days per material and version')
+    args = parser.parse_args()
+    start = date(2020, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = ForecastArchive(os.path.join(tmp, 'forecasts.db'))
+        t = time.perf_counter()
+        rows = 0
+        for m in MATERIALS:
+            for v in ('v1', 'v2'):
+                for i in range(args.days):
+                    issued = start + timedelta(days=i)
+                    rows += archive.record_forecast(m, v, issued, issued, [100.0] * 30)
+            archive.record_realized(m, [(start + timedelta(days=i), 101.0) for i in range(args.days + 30)])
+        print(f'wrote {rows} forecast rows in {time.perf_counter() - t:.2f}s')
+
+        for window in (30, 365):
+            t = time.perf_counter()
+            result = archive.accuracy('cement', horizons=(7, 30), window=window)
+            elapsed = (time.perf_counter() - t) * 1000
+            print(f'accuracy window={window}d: {len(result["metrics"])} metrics in {elapsed:.1f} ms')
+        archive._conn().close()
+
+
+if __name__ == '__main__':
+    main()
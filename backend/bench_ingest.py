@@ -0,0 +1,42 @@
+"""Measure StreamIngestor throughput on synthetic observations.
+
+    python backend/bench_ingest.py [--rows 200000]
+"""
+import os
+import time
+import argparse
+import tempfile
+
+from ingest_stream import StreamIngestor
+
+LOCATIONS = ['Davao City - Buhangin', 'Davao City - Calinan', 'Davao City - Mintal',
+             'Davao City - Panacan', 'Davao City - Poblacion', 'Davao City - Talomo',
+             'Davao City - Toril']
+
+
+def make_records(n):
+    return [{'date': f'2026-03-{1 + i % 28:02d}', 'material': 'cement', 'price': 244.0 + (i % 5) * 0.5,
+             'unit': '40kg bag', 'location': LOCATIONS[i % 7], 'source': 'Bench Hardware'}
+            for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+    records = make_records(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        for dry_run in (True, False):
+            ingestor = StreamIngestor(os.path.join(tmp, 'data.csv'), os.path.join(tmp, 'q.jsonl'),
+                                      dry_run=dry_run)
+            start = time.perf_counter()
+            try:
+                ingestor.ingest(records)
+            finally:
+                ingestor.close()
+            rate = args.rows / (time.perf_counter() - start)
+            print(f"{'check only' if dry_run else 'check + append'}: {rate:,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""Load test every API route against local BSP/PSA stubs and check latency baselines.
+
+    python backend/bench_load.py                       # in-process server, compare to baselines
+    python backend/bench_load.py --gunicorn --workers 4
+    python backend/bench_load.py --bsp-latency 800 --psa-fail 0.5
+    python backend/bench_load.py --update-baseline     # record this run as the new baseline
+
+Every route gets the same number of requests, so each percentile rests on a
+known sample count. Exits with status 1 when an endpoint's p95 latency
+regresses beyond --tolerance relative to bench_baselines.json, when it has
+fewer than --min-samples results, or when there is no baseline to compare
+against.
+"""
+import os
+import sys
+import json
+import math
+import logging
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'bench_baselines.json')
+
+# (name, method, path, json body); names group latencies in the report
+ROUTES = [
+    ('home', 'GET', '/', None),
+    ('predict', 'GET', '/predict/{material}', None),
+    ('estimate', 'POST', '/estimate', {'material': '{material}', 'quantity': 100, 'timeline': 30}),
+    ('market-insight', 'GET', '/market-insight/{material}', None),
+    ('materials', 'GET', '/materials', None),
+    ('materials-today', 'GET', '/materials-today', None),
+    ('footer-data', 'GET', '/footer-data', None),
+    ('history', 'GET', '/history/{material}?range=1y&resolution=auto', None),
+    ('accuracy', 'GET', '/accuracy/{material}', None),
+    ('alerts', 'GET', '/alerts?material={material}', None),
+]
+# evaluation writes to the alert store and scans it, so it runs in its own
+# phase after the mixed load instead of competing with it
+EVALUATE_ROUTE = ('alerts-evaluate', 'POST', '/alerts/evaluate', {})
+# POST /alerts and DELETE /alerts/<id> run as a pair (see alert_roundtrip) so
+# the alert store does not grow during a run; threshold 1 never fires
+ALERT_BODY = {'location': 'Toril', 'horizon': 30, 'direction': 'below', 'threshold': 1}
+ROUNDTRIP_NAMES = ('alerts-create', 'alerts-delete')
+MATERIALS = ['steel', 'cement', 'sand', 'gravel', 'lumber', 'plywood']
+# requests sent to each route, and the fewest results a route may gate on
+REQUESTS_PER_ROUTE = 200
+MIN_SAMPLES = 100
+
+
+class StubServer:
+    """Local stand-in for an external JSON API with injected latency and failures."""
+
+    def __init__(self, payload, latency_ms=0.0, fail_rate=0.0, seed=None):
+        self.payload = json.dumps(payload).encode('utf-8')
+        self.latency_ms = latency_ms
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    fail = stub._rng.random() < stub.fail_rate
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000.0)
+                if fail:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(stub.payload)))
+                self.end_headers()
+                self.wfile.write(stub.payload)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}/'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples):
+    """samples: {route: [(latency_s, ok), ...]} -> per-route latency and error counts."""
+    report = {}
+    for name, results in sorted(samples.items()):
+        lat = sorted(l * 1000.0 for l, _ in results)
+        errors = sum(1 for _, ok in results if not ok)
+        report[name] = {
+            'requests': len(results),
+            'errors': errors,
+            'p50_ms': round(percentile(lat, 50), 2),
+            'p95_ms': round(percentile(lat, 95), 2),
+            'p99_ms': round(percentile(lat, 99), 2),
+        }
+    return report
+
+
+def compare(report, baseline, tolerance, min_samples=MIN_SAMPLES):
+    """Regression messages for routes slower than baseline or too thinly sampled to judge."""
+    problems = []
+    for name, base in sorted(baseline.items()):
+        cur = report.get(name)
+        if cur is None:
+            problems.append(f'{name}: missing from this run')
+            continue
+        if cur['requests'] < min_samples:
+            problems.append(f"{name}: only {cur['requests']} samples (minimum {min_samples})")
+        elif cur['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            problems.append(f"{name}: p95 {cur['p95_ms']}ms > baseline {base['p95_ms']}ms")
+        if cur['errors'] > base.get('errors', 0):
+            problems.append(f"{name}: {cur['errors']} errors (baseline {base.get('errors', 0)})")
+    return problems
+
+
+def check_baseline(report, path, tolerance, min_samples=MIN_SAMPLES):
+    """compare() against the baseline file; a missing baseline is itself a failure."""
+    if not os.path.exists(path):
+        return [f'no baseline at {path}; run with --update-baseline to record one']
+    with open(path) as f:
+        return compare(report, json.load(f), tolerance, min_samples)
+
+
+def call(base_url, method, path, body, timeout=30):
+    """Returns (latency_s, ok, response body)."""
+    data = None
+    headers = {}
+    if body is not None:
+        data = json.dumps(body).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+    req = urllib.request.Request(base_url + path, data=data, headers=headers, method=method)
+    start = time.perf_counter()
+    content = b''
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            content = resp.read()
+            ok = resp.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - start, ok, content
+
+
+def alert_roundtrip(base_url, material):
+    """Register an alert then delete it; returns [(name, latency_s, ok), ...]."""
+    latency, ok, content = call(base_url, 'POST', '/alerts', dict(ALERT_BODY, material=material))
+    results = [(ROUNDTRIP_NAMES[0], latency, ok)]
+    if ok:
+        alert_id = json.loads(content)['id']
+        latency, ok, _ = call(base_url, 'DELETE', f'/alerts/{alert_id}', None)
+        results.append((ROUNDTRIP_NAMES[1], latency, ok))
+    return results
+
+
+def expand(route, material):
+    name, method, path, body = route
+    if body is not None:
+        body = {k: (v.format(material=material) if isinstance(v, str) else v) for k, v in body.items()}
+    return name, method, path.format(material=material), body
+
+
+def run_jobs(base_url, jobs, concurrency):
+    """Send `jobs` (route or None for an alert round trip, material) from a thread pool."""
+    def run(job):
+        route, material = job
+        if route is None:
+            return alert_roundtrip(base_url, material)
+        name, method, path, body = expand(route, material)
+        latency, ok, _ = call(base_url, method, path, body)
+        return [(name, latency, ok)]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return [r for results in pool.map(run, jobs) for r in results]
+
+
+def run_load(base_url, requests_per_route, concurrency, seed=0):
+    """Send `requests_per_route` requests to every route from `concurrency` threads.
+
+    The read routes and alert round trips are shuffled into one mixed phase;
+    /alerts/evaluate follows in a phase of its own.
+    """
+    rng = random.Random(seed)
+    mixed = [(route, rng.choice(MATERIALS)) for route in ROUTES + [None]
+             for _ in range(requests_per_route)]
+    rng.shuffle(mixed)
+    evaluate = [(EVALUATE_ROUTE, None)] * requests_per_route
+    samples = {}
+    for phase in (mixed, evaluate):
+        for name, latency, ok in run_jobs(base_url, phase, concurrency):
+            samples.setdefault(name, []).append((latency, ok))
+    return summarize(samples)
+
+
+def start_in_process():
+    """Serve app.app from a background thread; returns (base_url, stop)."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from werkzeug.serving import make_server
+    import app as app_module
+    # one access-log line per request would dominate the run and skew timings
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+    return f'http://127.0.0.1:{server.server_port}', stop
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers):
+    port = free_port()
+    proc = subprocess.Popen(
+        ['gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'app:app'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=os.environ.copy(),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        if proc.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        # make sure it is our app answering, not whatever else holds the port
+        _, ok, content = call(base_url, 'GET', '/', None, timeout=1)
+        if ok and b'Davao Build AI Backend' in content:
+            break
+        time.sleep(0.2)
+    else:
+        proc.terminate()
+        raise RuntimeError('gunicorn did not come up')
+
+    def stop():
+        proc.terminate()
+        proc.wait(10)
+    return base_url, stop
+
+
+def print_report(report):
+    print(f"{'endpoint':<18}{'reqs':>7}{'errs':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, r in report.items():
+        print(f"{name:<18}{r['requests']:>7}{r['errors']:>6}"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=REQUESTS_PER_ROUTE,
+                        help=f'requests per route (default {REQUESTS_PER_ROUTE})')
+    parser.add_argument('--min-samples', type=int, default=MIN_SAMPLES,
+                        help=f'fail a route with fewer results than this (default {MIN_SAMPLES})')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--gunicorn', action='store_true', help='serve with gunicorn instead of in-process')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--bsp-latency', type=float, default=20, help='BSP stub latency in ms')
+    parser.add_argument('--bsp-fail', type=float, default=0.0, help='BSP stub failure rate 0..1')
+    parser.add_argument('--psa-latency', type=float, default=20, help='PSA stub latency in ms')
+    parser.add_argument('--psa-fail', type=float, default=0.0, help='PSA stub failure rate 0..1')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed regression (default 25%%)')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--json', metavar='PATH', help='also write the report to PATH')
+    args = parser.parse_args(argv)
+
+    bsp = StubServer({'USD': 58.25}, args.bsp_latency, args.bsp_fail, seed=1).start()
+    psa = StubServer({'data': [{'inflation_rate': 3.1}]}, args.psa_latency, args.psa_fail, seed=2).start()
+    # keep the run away from the real archive, alert store and firing log
+    scratch = tempfile.TemporaryDirectory()
+    os.environ.update({
+        'BSP_RATES_URL': bsp.url,
+        'PSA_CPI_URL': psa.url,
+        'FORECAST_DB_PATH': os.path.join(scratch.name, 'forecasts.db'),
+        'ALERTS_DB_PATH': os.path.join(scratch.name, 'alerts.db'),
+        'ALERT_SINK': os.path.join(scratch.name, 'alert_firings.jsonl'),
+    })
+    stop = None
+    try:
+        base_url, stop = start_gunicorn(args.workers) if args.gunicorn else start_in_process()
+        # warm up lazy imports and caches so the first requests do not skew percentiles
+        for material in MATERIALS:
+            for route in ROUTES + [EVALUATE_ROUTE]:
+                call(base_url, *expand(route, material)[1:])
+            alert_roundtrip(base_url, material)
+        report = run_load(base_url, args.requests, args.concurrency)
+    finally:
+        if stop:
+            stop()
+        bsp.stop()
+        psa.stop()
+        scratch.cleanup()
+
+    print_report(report)
+    print(f'stub requests: BSP {bsp.requests}, PSA {psa.requests}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print('Saved baseline to', args.baseline)
+        return 0
+    problems = check_baseline(report, args.baseline, args.tolerance, args.min_samples)
+    for p in problems:
+        print('REGRESSION', p)
+    return 1 if problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
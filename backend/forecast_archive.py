@@ -0,0 +1,173 @@
+import os
+import math
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+DB_PATH = os.getenv('FORECAST_DB_PATH', os.path.join(os.path.dirname(__file__), 'forecasts.db'))
+
+# WITHOUT ROWID tables clustered on their lookup keys, plus one covering index
+# for the accuracy join, keep reads index-only as the archive grows
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    material TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    last_observed TEXT NOT NULL,
+    horizon INTEGER NOT NULL,
+    issued_date TEXT NOT NULL,
+    target_date TEXT NOT NULL,
+    predicted REAL NOT NULL,
+    PRIMARY KEY (material, model_version, last_observed, horizon)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_forecasts_target
+    ON forecasts (material, horizon, target_date, model_version, predicted);
+CREATE TABLE IF NOT EXISTS model_steps (
+    material TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    step_days INTEGER NOT NULL,
+    PRIMARY KEY (material, model_version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS realized (
+    material TEXT NOT NULL,
+    date TEXT NOT NULL,
+    price REAL NOT NULL,
+    PRIMARY KEY (material, date)
+) WITHOUT ROWID;
+"""
+
+# archives written before forecasts were keyed by last_observed: recover it
+# from target_date - horizon and keep the first serving of each path
+MIGRATE_SQL = """
+ALTER TABLE forecasts RENAME TO forecasts_by_issue;
+DROP INDEX IF EXISTS idx_forecasts_target;
+""" + SCHEMA + """
+INSERT OR IGNORE INTO forecasts
+SELECT material, model_version, date(target_date, '-' || horizon || ' days'), horizon,
+       issued_date, target_date, predicted
+FROM forecasts_by_issue ORDER BY issued_date;
+DROP TABLE forecasts_by_issue;
+"""
+
+ACCURACY_SQL = """
+SELECT f.model_version, f.horizon,
+       f.target_date > :split AS recent,
+       COUNT(*),
+       AVG(ABS(f.predicted - r.price)),
+       AVG(ABS(f.predicted - r.price) / r.price),
+       AVG(f.predicted - r.price)
+FROM forecasts f
+JOIN realized r ON r.material = f.material AND r.date = f.target_date
+WHERE f.material = :material AND f.horizon = :horizon AND f.model_version = :version
+  AND f.target_date > :start AND f.target_date <= :end
+GROUP BY f.model_version, f.horizon, recent
+"""
+
+
+# longest accuracy window accepted, in days
+MAX_WINDOW = 3650
+
+
+def infer_step_days(dates):
+    """Median spacing in days of a sorted list of dates; the model's forecast step."""
+    gaps = sorted((b - a).days for a, b in zip(dates, dates[1:]) if b > a)
+    if not gaps:
+        return 1
+    return max(1, gaps[len(gaps) // 2])
+
+
+class ForecastArchive:
+    """SQLite store of served forecasts joined against realized daily prices."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._archived = set()  # (material, model_version, last_observed) already written
+        with self._conn() as conn:
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(forecasts)')]
+            conn.executescript(MIGRATE_SQL if columns and 'last_observed' not in columns else SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def record_forecast(self, material, model_version, issued_date, last_observed, forecast, step_days=1):
+        """Archive one day's forecast path; step k targets last_observed + k * step_days.
+
+        The model predicts one step of its training series at a time, so on
+        weekly data step k is k weeks ahead. Horizons are stored in days.
+        A forecast is identified by material, model version and the last
+        observed date it was made from: until new data arrives the same path
+        is served every day, so only the first serving is kept (issued_date
+        records when). Repeated /predict calls cost a set lookup, not a write.
+        """
+        key = (material, model_version, last_observed.isoformat())
+        if key in self._archived:
+            return 0
+        issued = issued_date.isoformat()
+        rows = [(material, model_version, key[2], k * step_days, issued,
+                 (last_observed + timedelta(days=k * step_days)).isoformat(), float(p))
+                for k, p in enumerate(forecast, start=1)]
+        with self._conn() as conn:
+            conn.execute('INSERT OR REPLACE INTO model_steps VALUES (?,?,?)',
+                         (material, model_version, step_days))
+            cur = conn.executemany('INSERT OR IGNORE INTO forecasts VALUES (?,?,?,?,?,?,?)', rows)
+        self._archived.add(key)
+        return cur.rowcount
+
+    def record_realized(self, material, observations):
+        """Upsert realized (date, price) pairs for a material."""
+        rows = [(material, d.isoformat() if isinstance(d, date) else d, float(p))
+                for d, p in observations]
+        with self._conn() as conn:
+            conn.executemany('INSERT OR REPLACE INTO realized VALUES (?,?,?)', rows)
+        return len(rows)
+
+    def last_realized(self, material):
+        """Latest date with a realized price for a material, or None."""
+        row = self._conn().execute('SELECT MAX(date) FROM realized WHERE material = ?',
+                                   (material,)).fetchone()
+        return date.fromisoformat(row[0]) if row[0] else None
+
+    def accuracy(self, material, horizons=(7, 30), window=30):
+        """Rolling error per model version and horizon over the last `window` days.
+
+        A requested horizon in days maps to the first forecast step at or
+        beyond it, e.g. 30 days is step 5 (35 days) of a weekly model; the
+        entry reports both. `drift_mape_pct` is the MAPE change between the
+        latest window and the one before it; positive means getting worse.
+        """
+        if not 1 <= window <= MAX_WINDOW:
+            raise ValueError(f'window must be between 1 and {MAX_WINDOW} days')
+        end = self.last_realized(material)
+        if end is None:
+            return {'material': material, 'as_of': None, 'window_days': window, 'metrics': []}
+        conn = self._conn()
+        split = end - timedelta(days=window)
+        start = split - timedelta(days=window)
+        steps = conn.execute('SELECT model_version, step_days FROM model_steps WHERE material = ?',
+                             (material,)).fetchall()
+        metrics = []
+        for version, step in sorted(steps):
+            for requested in horizons:
+                horizon = math.ceil(requested / step) * step
+                params = {'material': material, 'version': version, 'horizon': horizon,
+                          'start': start.isoformat(), 'split': split.isoformat(), 'end': end.isoformat()}
+                parts = {bool(recent): (n, mae, mape, bias)
+                         for _, _, recent, n, mae, mape, bias in conn.execute(ACCURACY_SQL, params)}
+                if not parts:
+                    continue
+                entry = {'model_version': version, 'requested_horizon': requested, 'horizon': horizon,
+                         'n': 0, 'mae': None, 'mape_pct': None, 'bias': None, 'drift_mape_pct': None}
+                cur, prev = parts.get(True), parts.get(False)
+                if cur:
+                    n, mae, mape, bias = cur
+                    entry.update(n=n, mae=round(mae, 2), mape_pct=round(mape * 100, 2), bias=round(bias, 2))
+                    if prev:
+                        entry['drift_mape_pct'] = round((mape - prev[2]) * 100, 2)
+                metrics.append(entry)
+        return {'material': material, 'as_of': end.isoformat(), 'window_days': window, 'metrics': metrics}
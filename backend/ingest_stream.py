@@ -0,0 +1,275 @@
+import os
+import sys
+import csv
+import json
+import math
+import argparse
+from datetime import datetime
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'davaobuild_dataset_2025_2026.csv')
+QUARANTINE_PATH = os.path.join(os.path.dirname(__file__), 'quarantine.jsonl')
+
+FIELDS = ['date', 'material', 'price', 'unit', 'location', 'source',
+          'retail_or_wholesale', 'data_type', 'notes']
+
+# outlier rule: reject a quote more than Z_THRESHOLD ewma-stddevs away from
+# the ewma level once a material x location pair has MIN_COUNT observations
+Z_THRESHOLD = 4.0
+MIN_COUNT = 10
+EWMA_ALPHA = 0.1
+# never flag moves smaller than this fraction of the level, so a very
+# flat series does not quarantine every cent of movement
+MIN_REL_STD = 0.01
+# a real level change shows up as a run of outliers on the same side that
+# agree with each other; after REBASE_AFTER of them (each within REBASE_BAND
+# of the run's mean) the ewma jumps to the new level instead of locking it out
+REBASE_AFTER = 3
+REBASE_BAND = 0.04
+
+
+class RunningStats:
+    """Constant-memory price statistics for one material x location pair.
+
+    Welford's algorithm keeps the all-time mean/variance; an EWMA level and
+    variance track recent prices so slow drift is not mistaken for outliers.
+    A run of consistent same-side outliers re-bases the EWMA (see `flag`).
+    """
+    __slots__ = ('count', 'mean', 'm2', 'ewma', 'ewvar', 'min', 'max', 'streak', 'streak_sum')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = 0.0
+        self.ewvar = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.streak = 0  # signed length of the current run of outliers
+        self.streak_sum = 0.0
+
+    def flag(self, x):
+        """Record an outlier; True once the run says the level has really moved."""
+        side = 1 if x > self.ewma else -1
+        if self.streak * side > 0 and \
+                abs(x - self.streak_sum / abs(self.streak)) <= REBASE_BAND * x:
+            self.streak += side
+            self.streak_sum += x
+        else:
+            self.streak, self.streak_sum = side, x
+        if abs(self.streak) < REBASE_AFTER:
+            return False
+        self.ewma = self.streak_sum / abs(self.streak)
+        return True
+
+    def update(self, x):
+        self.streak, self.streak_sum = 0, 0.0
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if self.count == 1:
+            self.ewma = x
+        else:
+            diff = x - self.ewma
+            incr = EWMA_ALPHA * diff
+            self.ewma += incr
+            self.ewvar = (1 - EWMA_ALPHA) * (self.ewvar + diff * incr)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def zscore(self, x):
+        std = max(math.sqrt(self.ewvar), abs(self.ewma) * MIN_REL_STD)
+        return abs(x - self.ewma) / std if std > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean': round(self.mean, 4),
+            'std': round(self.std, 4),
+            'ewma': round(self.ewma, 4),
+            'ewma_std': round(math.sqrt(self.ewvar), 4),
+            'min': self.min,
+            'max': self.max,
+        }
+
+
+def parse_date(value):
+    """Accept dd/mm/yyyy (the dataset format) or ISO yyyy-mm-dd."""
+    value = str(value).strip()
+    for fmt in ('%d/%m/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    return None
+
+
+def read_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obs = json.loads(line)
+        except ValueError:
+            obs = None
+        yield obs if isinstance(obs, dict) else {'_raw': line}
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+class StreamIngestor:
+    """Validate observations, flag outliers and append clean rows to the dataset."""
+
+    def __init__(self, dataset_path=DATA_PATH, quarantine_path=QUARANTINE_PATH,
+                 z_threshold=Z_THRESHOLD, min_count=MIN_COUNT, dry_run=False):
+        self.dataset_path = dataset_path
+        self.quarantine_path = quarantine_path
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.dry_run = dry_run
+        self.stats = {}
+        self.accepted = 0
+        self.quarantined = 0
+        self._clean = None
+        self._quarantine = None
+        self._writer = None
+
+    def prime(self):
+        """Seed the running statistics from rows already in the dataset."""
+        if not os.path.exists(self.dataset_path):
+            return 0
+        n = 0
+        with open(self.dataset_path, newline='') as f:
+            for row in csv.DictReader(f):
+                try:
+                    price = float(row['price'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                self._stats_for(row['material'].strip().lower(), row['location'].strip()).update(price)
+                n += 1
+        return n
+
+    def _stats_for(self, material, location):
+        key = (material, location)
+        s = self.stats.get(key)
+        if s is None:
+            s = self.stats[key] = RunningStats()
+        return s
+
+    def check(self, obs):
+        """Return (row, reason). reason is None for a clean row."""
+        if not isinstance(obs, dict) or '_raw' in obs:
+            return obs, 'unparseable line'
+        material = str(obs.get('material') or '').strip().lower()
+        location = str(obs.get('location') or '').strip()
+        if not material or not location:
+            return obs, 'missing material or location'
+        date = parse_date(obs.get('date', ''))
+        if date is None:
+            return obs, 'invalid date'
+        try:
+            price = float(obs.get('price'))
+        except (TypeError, ValueError):
+            return obs, 'invalid price'
+        if not price > 0 or math.isinf(price):
+            return obs, 'invalid price'
+
+        row = {k: obs.get(k, '') for k in FIELDS}
+        row['date'] = date.strftime('%d/%m/%Y')
+        row['material'] = material
+        row['location'] = location
+        row['price'] = round(price, 2)
+
+        s = self._stats_for(material, location)
+        if s.count >= self.min_count:
+            z = s.zscore(price)
+            if z > self.z_threshold and not s.flag(price):
+                return row, f'outlier (z={z:.1f} vs ewma {s.ewma:.2f})'
+        s.update(price)
+        return row, None
+
+    def _open(self):
+        if self.dry_run or self._writer is not None:
+            return
+        new_file = not os.path.exists(self.dataset_path) or os.path.getsize(self.dataset_path) == 0
+        fields = FIELDS
+        needs_newline = False
+        if not new_file:
+            # keep the column order of the existing file and never glue a
+            # new row onto a last line that lacks its newline
+            with open(self.dataset_path, newline='') as f:
+                fields = next(csv.reader(f), None) or FIELDS
+            with open(self.dataset_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        self._clean = open(self.dataset_path, 'a', newline='')
+        self._writer = csv.DictWriter(self._clean, fieldnames=fields, extrasaction='ignore',
+                                      lineterminator='\n')
+        if new_file:
+            self._writer.writeheader()
+        elif needs_newline:
+            self._clean.write('\n')
+        self._quarantine = open(self.quarantine_path, 'a')
+
+    def close(self):
+        for f in (self._clean, self._quarantine):
+            if f is not None:
+                f.close()
+        self._clean = self._quarantine = self._writer = None
+
+    def ingest(self, records):
+        self._open()
+        for obs in records:
+            row, reason = self.check(obs)
+            if reason is None:
+                self.accepted += 1
+                if self._writer is not None:
+                    self._writer.writerow(row)
+            else:
+                self.quarantined += 1
+                if self._quarantine is not None:
+                    self._quarantine.write(json.dumps({'reason': reason, 'row': row}, default=str) + '\n')
+        return self.accepted, self.quarantined
+
+    def summary(self):
+        return {f'{m}|{loc}': s.to_dict() for (m, loc), s in sorted(self.stats.items())}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stream price observations into the dataset.')
+    parser.add_argument('input', nargs='?', default='-', help='JSONL/CSV file, or - for stdin')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='defaults to the file extension, else jsonl')
+    parser.add_argument('--dataset', default=DATA_PATH)
+    parser.add_argument('--quarantine', default=QUARANTINE_PATH)
+    parser.add_argument('--z', type=float, default=Z_THRESHOLD, help='outlier z-score threshold')
+    parser.add_argument('--dry-run', action='store_true', help='check rows without writing anything')
+    parser.add_argument('--stats', action='store_true', help='print per material x location statistics')
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('csv' if args.input.endswith('.csv') else 'jsonl')
+    ingestor = StreamIngestor(args.dataset, args.quarantine, z_threshold=args.z, dry_run=args.dry_run)
+    primed = ingestor.prime()
+    stream = sys.stdin if args.input == '-' else open(args.input, newline='')
+    try:
+        reader = read_csv(stream) if fmt == 'csv' else read_jsonl(stream)
+        accepted, quarantined = ingestor.ingest(reader)
+    finally:
+        ingestor.close()
+        if stream is not sys.stdin:
+            stream.close()
+    print(f'Primed from {primed} rows; accepted {accepted}, quarantined {quarantined}')
+    if args.stats:
+        print(json.dumps(ingestor.summary(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+import os
+import csv
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
+
+RESOLUTIONS = ('day', 'week', 'month')
+BUCKET_DAYS = {'day': 1, 'week': 7, 'month': 30}
+# most points a /history response returns; a query never reads more than
+# AUTO_FACTOR * max_points buckets, so LTTB always works on a bounded input:
+# 'auto' picks the finest resolution that fits, an explicit resolution is
+# coarsened until it fits, and beyond that the range is trimmed to the most
+# recent buckets
+MAX_POINTS = 200
+AUTO_FACTOR = 4
+# smoothing for the per-location price level, matching ingest_stream's EWMA
+LEVEL_ALPHA = 0.1
+
+
+def bucket_start(d, resolution):
+    if resolution == 'week':
+        return d - timedelta(days=d.weekday())
+    if resolution == 'month':
+        return d.replace(day=1)
+    return d
+
+
+class Bucket:
+    """OHLC plus mean over every quote that falls into one day/week/month."""
+    __slots__ = ('open', 'open_date', 'close', 'close_date', 'high', 'low', 'total', 'count')
+
+    def __init__(self, d, price):
+        self.open = self.close = self.high = self.low = price
+        self.open_date = self.close_date = d
+        self.total = price
+        self.count = 1
+
+    def add(self, d, price):
+        if d < self.open_date:
+            self.open, self.open_date = price, d
+        if d >= self.close_date:
+            self.close, self.close_date = price, d
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.total += price
+        self.count += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+
+class Series:
+    """Buckets for one material at one resolution, ordered by start date."""
+
+    def __init__(self):
+        self.keys = []     # bucket start dates as ordinals, sorted
+        self.buckets = {}  # ordinal -> Bucket
+
+    def add(self, d, price, resolution):
+        key = bucket_start(d, resolution).toordinal()
+        b = self.buckets.get(key)
+        if b is not None:
+            b.add(d, price)
+            return
+        self.buckets[key] = Bucket(d, price)
+        if not self.keys or key > self.keys[-1]:
+            self.keys.append(key)
+        else:
+            insort(self.keys, key)
+
+    def span(self, start, end, limit=None):
+        """Bucket keys whose start lies in [start, end] (ordinals), at most the last `limit`."""
+        lo, hi = bisect_left(self.keys, start), bisect_right(self.keys, end)
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return self.keys[lo:hi]
+
+
+def lttb(xs, ys, threshold):
+    """Largest-Triangle-Three-Buckets downsampling; returns kept indices."""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    kept = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # average of the next bucket is the third triangle vertex
+        nxt_start = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        cnt = nxt_end - nxt_start
+        avg_x = sum(xs[nxt_start:nxt_end]) / cnt
+        avg_y = sum(ys[nxt_start:nxt_end]) / cnt
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+def parse_range(value):
+    """'90d', '12w', '6m', '2y' -> days; 'all' or empty -> None."""
+    value = (value or 'all').strip().lower()
+    if value == 'all':
+        return None
+    units = {'d': 1, 'w': 7, 'm': 30, 'y': 365}
+    if len(value) < 2 or value[-1] not in units or not value[:-1].isdigit():
+        raise ValueError(f'invalid range: {value}')
+    count = int(value[:-1])
+    if count < 1:
+        raise ValueError(f'invalid range: {value}')
+    return count * units[value[-1]]
+
+
+class RollupStore:
+    """Daily, weekly and monthly rollups per material, maintained incrementally.
+
+    `sync_csv` only reads the bytes appended to the dataset since the last
+    call, so the store stays current as `ingest_stream.py` adds rows.
+    """
+
+    def __init__(self):
+        self.series = {}  # (material, resolution) -> Series
+        self.last_date = {}
+        self.levels = {}  # (material, location) -> EWMA of its quotes
+        self._lock = threading.Lock()
+        self._path = None
+        self._offset = 0
+        self._header = None
+
+    def add(self, material, d, price, location=None):
+        if location:
+            key = (material, location)
+            level = self.levels.get(key)
+            self.levels[key] = price if level is None else level + LEVEL_ALPHA * (price - level)
+        for res in RESOLUTIONS:
+            key = (material, res)
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = Series()
+            s.add(d, price, res)
+        if d > self.last_date.get(material, date.min):
+            self.last_date[material] = d
+
+    def materials(self):
+        return sorted(self.last_date)
+
+    def location_levels(self):
+        """{material: {location: recent EWMA price level}}"""
+        with self._lock:
+            result = {}
+            for (material, location), level in self.levels.items():
+                result.setdefault(material, {})[location] = level
+            return result
+
+    def sync_csv(self, path):
+        """Fold rows appended to the CSV since the previous sync into the rollups."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return 0
+        with self._lock:
+            if path != self._path or st.st_size < self._offset:
+                # new or rewritten file: rebuild from scratch
+                self.series, self.last_date, self.levels = {}, {}, {}
+                self._path, self._offset, self._header = path, 0, None
+            if st.st_size == self._offset:
+                return 0
+            added = 0
+            with open(path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+            # only consume complete lines; a partially written row waits for the next sync
+            end = data.rfind(b'\n') + 1
+            lines = data[:end].decode('utf-8').splitlines()
+            if self._header is None and lines:
+                self._header = next(csv.reader([lines[0]]))
+                lines = lines[1:]
+            for row in csv.DictReader(lines, fieldnames=self._header):
+                try:
+                    d = datetime.strptime(row['date'].strip(), '%d/%m/%Y').date()
+                    price = float(row['price'])
+                except (KeyError, AttributeError, TypeError, ValueError):
+                    continue
+                self.add(row['material'].strip().lower(), d, price, (row.get('location') or '').strip())
+                added += 1
+            self._offset += end
+            return added
+
+    def daily_means(self, material, since=None):
+        """[(date, mean price)] for each day on or after `since`."""
+        with self._lock:
+            series = self.series.get((material, 'day'))
+            if series is None:
+                return []
+            keys = series.span(since.toordinal() if since else 0, date.max.toordinal())
+            return [(date.fromordinal(k), series.buckets[k].mean) for k in keys]
+
+    def query(self, material, days=None, resolution='auto', max_points=MAX_POINTS):
+        """Chart-ready rollup for `material` over the last `days` of its data."""
+        if resolution != 'auto' and resolution not in RESOLUTIONS:
+            raise ValueError(f'invalid resolution: {resolution}')
+        cap = max_points * AUTO_FACTOR
+        with self._lock:
+            last = self.last_date.get(material)
+            if last is None:
+                return None
+            end = last.toordinal()
+            # never start before the first bucket, so huge ranges stay valid ordinals
+            first = self.series[(material, 'day')].keys[0]
+            start = first if days is None else max(end - days + 1, first)
+            span_days = end - start + 1
+            finest = 'day' if resolution == 'auto' else resolution
+            resolution = 'month'
+            for res in RESOLUTIONS[RESOLUTIONS.index(finest):]:
+                if span_days / BUCKET_DAYS[res] <= cap:
+                    resolution = res
+                    break
+            series = self.series[(material, resolution)]
+            # include the bucket that straddles the range start
+            keys = series.span(bucket_start(date.fromordinal(start), resolution).toordinal(), end, limit=cap)
+            buckets = [series.buckets[k] for k in keys]
+
+        ys = [b.mean for b in buckets]
+        idx = lttb(keys, ys, max_points)
+        picked = [buckets[i] for i in idx]
+        return {
+            'material': material,
+            'resolution': resolution,
+            'start': date.fromordinal(keys[idx[0]]).isoformat() if idx else None,
+            'end': last.isoformat(),
+            'points': len(idx),
+            'downsampled': len(idx) < len(keys),
+            'dates': [date.fromordinal(keys[i]).isoformat() for i in idx],
+            'open': [round(b.open, 2) for b in picked],
+            'high': [round(b.high, 2) for b in picked],
+            'low': [round(b.low, 2) for b in picked],
+            'close': [round(b.close, 2) for b in picked],
+            'mean': [round(b.mean, 2) for b in picked],
+            'count': [b.count for b in picked],
+        }
@@ -0,0 +1,157 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+from http.server import HTTPServer
+
+from alerts import AlertEngine, FileSink, WebhookSink, _WebhookHandler, CROSSED_SQL
+
+
+class ListSink:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, firings):
+        self.sent.extend(firings)
+
+
+class FailingSink:
+    def send(self, firings):
+        raise IOError('sink down')
+
+
+class TestAlertEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmp.name, 'alerts.db')
+        self.sink = ListSink()
+        self.engine = AlertEngine(self.db, sink=self.sink)
+
+    def tearDown(self):
+        self.engine._conn().close()
+        self.tmp.cleanup()
+
+    def test_fires_only_crossed_thresholds_once(self):
+        toril = 'Davao City - Toril'
+        a = self.engine.add('cement', 30, 'below', 240, toril)
+        self.engine.add('cement', 30, 'below', 230, toril)
+        b = self.engine.add('cement', 30, 'above', 250, toril)
+        self.engine.add('cement', 7, 'below', 245, toril)
+        self.engine.add('cement', 30, 'below', 245)
+
+        fired = self.engine.evaluate('cement', {(toril, 30): 239.5})
+        self.assertEqual([f['id'] for f in fired], [a['id']])
+        self.assertEqual(fired[0]['forecast'], 239.5)
+        self.assertEqual(self.engine.evaluate('cement', {(toril, 30): 239.5}), [])
+
+        fired = self.engine.evaluate('cement', {(toril, 30): 251.0})
+        self.assertEqual([f['id'] for f in fired], [b['id']])
+        self.assertEqual(self.engine.count(), 3)
+        self.assertEqual(len(self.sink.sent), 2)
+
+    def test_state_survives_restart(self):
+        keep = self.engine.add('sand', 7, 'above', 90)
+        gone = self.engine.add('sand', 7, 'above', 80)
+        dropped = self.engine.add('sand', 7, 'below', 50)
+        self.engine.evaluate('sand', {('', 7): 85})
+        self.assertTrue(self.engine.remove(dropped['id']))
+        self.assertFalse(self.engine.remove(gone['id']))
+        reloaded = AlertEngine(self.db, sink=ListSink())
+        self.assertEqual([a['id'] for a in reloaded.list()], [keep['id']])
+        reloaded._conn().close()
+
+    def test_ids_not_reused(self):
+        first = self.engine.add('lumber', 7, 'below', 90)
+        newest = self.engine.add('lumber', 7, 'below', 95)
+        self.assertTrue(self.engine.remove(newest['id']))
+        later = self.engine.add('lumber', 7, 'below', 96)
+        self.assertGreater(later['id'], newest['id'])
+        self.assertFalse(self.engine.remove(newest['id']))
+        self.assertEqual([a['id'] for a in self.engine.list('lumber')], [first['id'], later['id']])
+
+    def test_failed_sink_keeps_alerts(self):
+        engine = AlertEngine(self.db, sink=FailingSink())
+        engine.add('steel', 30, 'below', 200)
+        with self.assertRaises(IOError):
+            engine.evaluate('steel', {('', 30): 190})
+        self.assertEqual(engine.count(), 1)
+        engine.sink = self.sink
+        self.assertEqual(len(engine.evaluate('steel', {('', 30): 190})), 1)
+        engine._conn().close()
+
+    def test_workers_share_state(self):
+        # two engines on one database stand in for two gunicorn workers
+        other = AlertEngine(self.db, sink=ListSink())
+        kept = self.engine.add('plywood', 7, 'above', 850)
+        dropped = self.engine.add('plywood', 7, 'above', 840)
+        self.assertTrue(other.remove(dropped['id']))
+        self.assertFalse(self.engine.remove(dropped['id']))
+        self.assertEqual([a['id'] for a in self.engine.list()], [kept['id']])
+        # both see the crossing, but only the first to claim the alert sends it
+        self.assertEqual([f['id'] for f in other.evaluate('plywood', {('', 7): 860})], [kept['id']])
+        self.assertEqual(self.engine.evaluate('plywood', {('', 7): 860}), [])
+        self.assertEqual((len(other.sink.sent), len(self.sink.sent)), (1, 0))
+        other._conn().close()
+
+    def test_crossed_query_is_indexed(self):
+        for sql in CROSSED_SQL.values():
+            plan = self.engine._conn().execute(
+                'EXPLAIN QUERY PLAN ' + sql,
+                {'material': 'sand', 'location': '', 'horizon': 7, 'value': 80}).fetchall()
+            details = ' '.join(row[-1] for row in plan)
+            self.assertIn('idx_alerts_pending', details)
+            self.assertIn('threshold', details)
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            self.engine.add('cement', 30, 'sideways', 240)
+        with self.assertRaises(ValueError):
+            self.engine.add('cement', 0, 'below', 240)
+        with self.assertRaises(ValueError):
+            self.engine.add('cement', 45, 'below', 10000)
+        with self.assertRaises(ValueError):
+            self.engine.add('cement', 30, 'below', 240, location=5)
+        with self.assertRaises(ValueError):
+            self.engine.add(['cement'], 30, 'below', 240)
+        with self.assertRaises(ValueError):
+            self.engine.add('cement', 30, 'below', 'cheap')
+        for threshold in (float('inf'), float('nan'), '1e400', 'Infinity'):
+            with self.assertRaises(ValueError):
+                self.engine.add('cement', 30, 'below', threshold)
+        for horizon in (7.9, '7.9', 30.5):
+            with self.assertRaises(ValueError):
+                self.engine.add('cement', horizon, 'below', 240)
+        self.assertEqual(self.engine.add('cement', 7.0, 'below', '240')['horizon'], 7)
+        self.assertEqual(self.engine.count(), 1)
+
+    def test_many_alerts_match_scan(self):
+        specs = [('gravel', '', 7, 'below' if i % 2 else 'above', 60 + (i % 300) * 0.1)
+                 for i in range(3000)]
+        self.engine.add_many(specs)
+        value = 72.5
+        expected = sum(1 for _, _, _, d, t in specs
+                       if (d == 'below' and value < t) or (d == 'above' and value > t))
+        self.assertEqual(len(self.engine.evaluate('gravel', {('', 7): value})), expected)
+
+
+class TestSinks(unittest.TestCase):
+    def test_file_sink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'firings.jsonl')
+            FileSink(path).send([{'id': 1}, {'id': 2}])
+            with open(path) as f:
+                self.assertEqual([json.loads(l)['id'] for l in f], [1, 2])
+
+    def test_webhook_sink(self):
+        server = HTTPServer(('127.0.0.1', 0), _WebhookHandler)
+        thread = threading.Thread(target=server.handle_request, daemon=True)
+        thread.start()
+        WebhookSink(f'http://127.0.0.1:{server.server_port}/').send([{'id': 1}])
+        thread.join(5)
+        server.server_close()
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
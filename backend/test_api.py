@@ -1,7 +1,8 @@
+import os
 import unittest
 import requests
 
-BASE = "http://127.0.0.1:5000"
+BASE = os.getenv("API_BASE", "http://127.0.0.1:5000")
 
 class TestAPI(unittest.TestCase):
     def test_predict(self):
@@ -40,5 +41,34 @@ class TestAPI(unittest.TestCase):
         self.assertIn("exchange_rate", data)
         self.assertIn("regional_inflation", data)
 
+    def test_history(self):
+        r = requests.get(f"{BASE}/history/cement", params={"range": "1y", "resolution": "week"})
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertEqual(data["resolution"], "week")
+        for key in ("dates", "open", "high", "low", "close", "mean"):
+            self.assertEqual(len(data[key]), data["points"])
+        self.assertLessEqual(data["points"], 200)
+
+    def test_accuracy(self):
+        requests.get(f"{BASE}/predict/cement")
+        r = requests.get(f"{BASE}/accuracy/cement", params={"window": 30, "horizons": "7,30"})
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertIn("as_of", data)
+        self.assertIn("metrics", data)
+
+    def test_alerts(self):
+        r = requests.post(f"{BASE}/alerts", json={"material": "cement", "location": "Toril",
+                                                  "horizon": 30, "direction": "below", "threshold": 1})
+        self.assertEqual(r.status_code, 201)
+        alert = r.json()
+        self.assertEqual(alert["location"], "Davao City - Toril")
+        r = requests.post(f"{BASE}/alerts/evaluate")
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("fired", r.json())
+        r = requests.delete(f"{BASE}/alerts/{alert['id']}")
+        self.assertEqual(r.status_code, 200)
+
 if __name__ == "__main__":
     unittest.main()
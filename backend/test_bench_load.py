@@ -0,0 +1,95 @@
+import os
+import json
+import tempfile
+import unittest
+import urllib.request
+import urllib.error
+
+from bench_load import (StubServer, percentile, summarize, compare, check_baseline, call, free_port,
+                        run_load, ROUTES)
+
+
+class TestStubServer(unittest.TestCase):
+    def test_payload_latency_and_failures(self):
+        stub = StubServer({'USD': 58.25}, latency_ms=50).start()
+        try:
+            with urllib.request.urlopen(stub.url, timeout=5) as resp:
+                self.assertEqual(json.loads(resp.read()), {'USD': 58.25})
+            latency, ok, content = call(stub.url.rstrip('/'), 'GET', '/', None)
+            self.assertTrue(ok)
+            self.assertEqual(json.loads(content), {'USD': 58.25})
+            self.assertGreaterEqual(latency, 0.05)
+        finally:
+            stub.stop()
+
+        stub = StubServer({}, fail_rate=1.0).start()
+        try:
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(stub.url, timeout=5)
+            self.assertEqual(stub.requests, 1)
+        finally:
+            stub.stop()
+
+
+class TestReport(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summarize_and_compare(self):
+        samples = {'predict': [(0.010, True)] * 95 + [(0.100, False)] * 5}
+        report = summarize(samples)
+        self.assertEqual(report['predict']['requests'], 100)
+        self.assertEqual(report['predict']['p50_ms'], 10)
+        self.assertEqual(report['predict']['p99_ms'], 100)
+        self.assertEqual(report['predict']['errors'], 5)
+
+        baseline = {'predict': dict(report['predict'], p95_ms=8, errors=5)}
+        self.assertEqual(compare(report, baseline, 0.5, min_samples=100), [])
+        problems = compare(report, baseline, 0.1, min_samples=100)
+        self.assertEqual(len(problems), 1)
+        self.assertIn('p95', problems[0])
+        baseline['history'] = report['predict']
+        self.assertIn('history: missing from this run', compare(report, baseline, 0.5, min_samples=100))
+
+    def test_too_few_samples_fails(self):
+        # a fast but thinly sampled route fails instead of comparing percentiles
+        report = summarize({'alerts-delete': [(0.001, True)] * 3})
+        baseline = {'alerts-delete': dict(report['alerts-delete'], p95_ms=100)}
+        self.assertEqual(compare(report, baseline, 0.25, min_samples=3), [])
+        self.assertEqual(compare(report, baseline, 0.25, min_samples=4),
+                         ['alerts-delete: only 3 samples (minimum 4)'])
+
+    def test_fixed_requests_per_route(self):
+        # the stub answers GETs only, so every POST fails and no alert is ever deleted
+        stub = StubServer({}).start()
+        try:
+            report = run_load(stub.url.rstrip('/'), 5, concurrency=4)
+        finally:
+            stub.stop()
+        for name, method, _, _ in ROUTES:
+            self.assertEqual(report[name]['requests'], 5)
+            self.assertEqual(report[name]['errors'], 0 if method == 'GET' else 5)
+        self.assertEqual(report['alerts-evaluate']['requests'], 5)
+        self.assertEqual(report['alerts-create']['errors'], 5)
+        self.assertNotIn('alerts-delete', report)
+
+    def test_missing_baseline_fails(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'baseline.json')
+            report = summarize({'home': [(0.001, True)]})
+            self.assertEqual(len(check_baseline(report, path, 0.25)), 1)
+            with open(path, 'w') as f:
+                json.dump(report, f)
+            self.assertEqual(check_baseline(report, path, 0.25, min_samples=1), [])
+
+    def test_free_port(self):
+        self.assertGreater(free_port(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
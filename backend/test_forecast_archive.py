@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from forecast_archive import ForecastArchive, ACCURACY_SQL, MAX_WINDOW, infer_step_days
+
+
+class TestForecastArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = ForecastArchive(os.path.join(self.tmp.name, 'forecasts.db'))
+
+    def tearDown(self):
+        self.archive._conn().close()
+        self.tmp.cleanup()
+
+    def test_one_write_per_day(self):
+        day = date(2026, 2, 25)
+        n = self.archive.record_forecast('cement', 'v1', day, day, [250.0] * 30)
+        self.assertEqual(n, 30)
+        self.assertEqual(self.archive.record_forecast('cement', 'v1', day, day, [1.0] * 30), 0)
+        # a fresh process re-serving the same day keeps the first forecast
+        other = ForecastArchive(self.archive.path)
+        self.assertEqual(other.record_forecast('cement', 'v1', day, day, [1.0] * 30), 0)
+
+    def test_reserved_path_counted_once(self):
+        # weekly data: the same path is served every day until the next quote
+        last = date(2026, 2, 2)
+        weeks = [last + timedelta(weeks=i) for i in range(6)]
+        self.archive.record_realized('gravel', [(d, 60.0) for d in weeks])
+        path = [61.0] * 5
+        written = [self.archive.record_forecast('gravel', 'v1', last + timedelta(days=i), last, path, step_days=7)
+                   for i in range(7)]
+        # a fresh process serving it on yet another day does not write it again
+        other = ForecastArchive(self.archive.path)
+        written.append(other.record_forecast('gravel', 'v1', last + timedelta(days=7), last, path, step_days=7))
+        self.assertEqual(written, [5] + [0] * 7)
+        metrics = self.archive.accuracy('gravel', horizons=(7, 30), window=60)['metrics']
+        self.assertEqual([m['n'] for m in metrics], [1, 1])
+
+    def test_accuracy_and_drift(self):
+        start = date(2026, 1, 1)
+        realized = [(start + timedelta(days=i), 100.0) for i in range(70)]
+        self.archive.record_realized('sand', realized)
+        for i in range(60):
+            issued = start + timedelta(days=i)
+            # forecasts issued later are further off, so drift is positive
+            err = 2.0 if i < 30 else 5.0
+            self.archive.record_forecast('sand', 'v1', issued, issued, [100.0 + err] * 7)
+        result = self.archive.accuracy('sand', horizons=(7,), window=30)
+        self.assertEqual(result['as_of'], '2026-03-11')
+        m = result['metrics'][0]
+        self.assertEqual((m['model_version'], m['horizon']), ('v1', 7))
+        self.assertEqual(m['mae'], 5.0)
+        self.assertEqual(m['bias'], 5.0)
+        self.assertGreater(m['drift_mape_pct'], 0)
+        self.assertEqual(self.archive.accuracy('steel')['metrics'], [])
+
+    def test_accuracy_query_is_indexed(self):
+        plan = self.archive._conn().execute(
+            'EXPLAIN QUERY PLAN ' + ACCURACY_SQL,
+            {'material': 'sand', 'version': 'v1', 'horizon': 7, 'start': '', 'split': '', 'end': ''}).fetchall()
+        details = ' '.join(row[-1] for row in plan)
+        self.assertIn('idx_forecasts_target', details)
+        self.assertIn('PRIMARY KEY', details)
+        self.assertNotIn('SCAN', details.replace('COVERING INDEX', ''))
+
+    def test_weekly_cadence(self):
+        # weekly prices rise by 1 each week; a perfect model predicts step k
+        # as k weeks ahead, so both the 7- and 30-day metrics must be exact
+        start = date(2025, 1, 1)
+        weeks = [start + timedelta(weeks=i) for i in range(61)]
+        self.archive.record_realized('cement', [(d, 240.0 + i) for i, d in enumerate(weeks)])
+        self.assertEqual(infer_step_days(weeks), 7)
+        for i, d in enumerate(weeks[:56]):
+            path = [240.0 + i + k for k in range(1, 31)]
+            self.archive.record_forecast('cement', 'rf', d, d, path, step_days=infer_step_days(weeks))
+        metrics = self.archive.accuracy('cement', horizons=(7, 30), window=60)['metrics']
+        self.assertEqual([(m['requested_horizon'], m['horizon']) for m in metrics], [(7, 7), (30, 35)])
+        for m in metrics:
+            self.assertGreater(m['n'], 0)
+            self.assertEqual(m['mae'], 0)
+
+    def test_window_bounds(self):
+        for window in (0, MAX_WINDOW + 1):
+            with self.assertRaises(ValueError):
+                self.archive.accuracy('sand', window=window)
+
+if __name__ == '__main__':
+    unittest.main()
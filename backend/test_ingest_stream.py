@@ -0,0 +1,105 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+
+from ingest_stream import StreamIngestor, RunningStats, read_jsonl, read_csv
+
+
+def obs(price, day=1, material='cement', location='Davao City - Toril'):
+    return {'date': f'2026-03-{day:02d}', 'material': material, 'price': price,
+            'unit': '40kg bag', 'location': location, 'source': 'Test Hardware',
+            'retail_or_wholesale': 'retail', 'data_type': 'public_reference', 'notes': ''}
+
+
+class TestRunningStats(unittest.TestCase):
+    def test_welford_matches_two_pass(self):
+        xs = [240.0, 244.5, 246.0, 248.0, 244.0, 251.5]
+        s = RunningStats()
+        for x in xs:
+            s.update(x)
+        mean = sum(xs) / len(xs)
+        var = sum((x - mean) ** 2 for x in xs) / (len(xs) - 1)
+        self.assertAlmostEqual(s.mean, mean)
+        self.assertAlmostEqual(s.std ** 2, var)
+        self.assertEqual((s.min, s.max), (240.0, 251.5))
+
+
+class TestStreamIngestor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dataset = os.path.join(self.tmp.name, 'data.csv')
+        self.quarantine = os.path.join(self.tmp.name, 'quarantine.jsonl')
+        with open(self.dataset, 'w') as f:
+            f.write('date,material,price,unit,location,source,retail_or_wholesale,data_type,notes\n')
+            for day in range(1, 21):
+                f.write(f'{day:02d}/02/2026,cement,{244 + day % 3},40kg bag,Davao City - Toril,'
+                        'Test Hardware,retail,public_reference,\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_ingest(self, records, **kwargs):
+        ingestor = StreamIngestor(self.dataset, self.quarantine, **kwargs)
+        ingestor.prime()
+        try:
+            ingestor.ingest(records)
+        finally:
+            ingestor.close()
+        return ingestor
+
+    def test_outliers_quarantined_clean_rows_appended(self):
+        ing = self.run_ingest([obs(246.0, 1), obs(2450.0, 2), obs('n/a', 3), obs(245.5, 4)])
+        self.assertEqual((ing.accepted, ing.quarantined), (2, 2))
+        with open(self.dataset) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 1 + 20 + 2)
+        self.assertTrue(lines[-1].startswith('04/03/2026,cement,245.5,'))
+        with open(self.quarantine) as f:
+            reasons = [json.loads(l)['reason'] for l in f]
+        self.assertTrue(reasons[0].startswith('outlier'))
+        self.assertEqual(reasons[1], 'invalid price')
+
+    def test_outlier_does_not_move_stats(self):
+        ing = self.run_ingest([obs(9999.0)], dry_run=True)
+        s = ing.stats[('cement', 'Davao City - Toril')]
+        self.assertEqual(s.count, 20)
+        self.assertLess(s.max, 300)
+        self.assertFalse(os.path.exists(self.quarantine))
+
+    def test_new_pair_warms_up_before_flagging(self):
+        ing = self.run_ingest([obs(100.0, location='Davao City - Mintal'),
+                               obs(900.0, location='Davao City - Mintal')], dry_run=True)
+        self.assertEqual(ing.quarantined, 0)
+
+    def test_readers(self):
+        jsonl = io.StringIO(json.dumps(obs(246.0)) + '\n\nnot json\n')
+        rows = list(read_jsonl(jsonl))
+        self.assertEqual(rows[0]['price'], 246.0)
+        self.assertIn('_raw', rows[1])
+        text = 'date,material,price,location\n05/03/2026,Cement,247,Davao City - Toril\n'
+        ing = self.run_ingest(read_csv(io.StringIO(text)), dry_run=True)
+        self.assertEqual(ing.accepted, 1)
+
+    def test_regime_shift_rebases(self):
+        # prices step up 12% and stay there: only the first few are held back
+        shifted = [obs(round(245 * 1.12 + (i % 3) * 0.5, 2), 1 + i % 28) for i in range(52)]
+        ing = self.run_ingest(shifted, dry_run=True)
+        self.assertEqual((ing.accepted, ing.quarantined), (50, 2))
+        s = ing.stats[('cement', 'Davao City - Toril')]
+        self.assertAlmostEqual(s.ewma, 245 * 1.12, delta=2)
+
+    def test_scattered_outliers_do_not_rebase(self):
+        records = [obs(2450.0), obs(24.5), obs(2450.0), obs(24.5), obs(900.0), obs(5000.0)]
+        ing = self.run_ingest(records, dry_run=True)
+        self.assertEqual(ing.quarantined, 6)
+
+    def test_non_object_json_lines(self):
+        rows = list(read_jsonl(io.StringIO('42\n[1, 2]\n"x"\nnull\n' + json.dumps(obs(246.0)) + '\n')))
+        ing = self.run_ingest(rows + [42, [1, 2]], dry_run=True)
+        self.assertEqual((ing.accepted, ing.quarantined), (1, 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from rollups import RollupStore, lttb, parse_range
+
+DATASET = os.path.join(os.path.dirname(__file__), '..', 'davaobuild_dataset_2025_2026.csv')
+HEADER = 'date,material,price,unit,location,source,retail_or_wholesale,data_type,notes\n'
+
+
+class TestLTTB(unittest.TestCase):
+    def test_keeps_endpoints_and_peaks(self):
+        xs = list(range(1000))
+        ys = [0.0] * 1000
+        ys[500] = 100.0
+        idx = lttb(xs, ys, 50)
+        self.assertEqual(len(idx), 50)
+        self.assertEqual((idx[0], idx[-1]), (0, 999))
+        self.assertIn(500, idx)
+        self.assertEqual(idx, sorted(idx))
+
+    def test_short_input_untouched(self):
+        self.assertEqual(lttb([1, 2, 3], [1, 2, 3], 10), [0, 1, 2])
+
+
+class TestRollupStore(unittest.TestCase):
+    def test_weekly_ohlc(self):
+        store = RollupStore()
+        # Mon 2026-02-02 .. Sun 2026-02-08 fall in one week
+        for i, price in enumerate([240, 250, 235, 245]):
+            store.add('cement', date(2026, 2, 2) + timedelta(days=i * 2), price)
+        data = store.query('cement', resolution='week')
+        self.assertEqual(data['dates'], ['2026-02-02'])
+        self.assertEqual((data['open'], data['high'], data['low'], data['close']),
+                         ([240], [250], [235], [245]))
+        self.assertEqual(data['mean'], [242.5])
+
+    def test_incremental_sync(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'data.csv')
+            with open(path, 'w') as f:
+                f.write(HEADER + '01/02/2026,sand,85,cu.m,Davao City - Toril,X,retail,synthetic,\n')
+            store = RollupStore()
+            self.assertEqual(store.sync_csv(path), 1)
+            self.assertEqual(store.sync_csv(path), 0)
+            with open(path, 'a') as f:
+                f.write('02/02/2026,sand,87,cu.m,Davao City - Toril,X,retail,synthetic,\n03/02/2026,sa')
+            self.assertEqual(store.sync_csv(path), 1)
+            with open(path, 'a') as f:
+                f.write('nd,89,cu.m,Davao City - Toril,X,retail,synthetic,\n')
+            self.assertEqual(store.sync_csv(path), 1)
+            self.assertEqual(store.query('sand', resolution='day')['mean'], [85, 87, 89])
+            self.assertEqual(store.location_levels(), {'sand': {'Davao City - Toril': 85 + 0.2 + 0.38}})
+
+    def test_dataset_auto_resolution_bounded(self):
+        store = RollupStore()
+        store.sync_csv(DATASET)
+        self.assertIn('cement', store.materials())
+        daily = store.query('cement', days=parse_range('90d'))
+        self.assertEqual(daily['resolution'], 'day')
+        self.assertEqual(daily['end'], '2026-02-25')
+        full = store.query('cement', resolution='day', max_points=20)
+        self.assertEqual(full['points'], 20)
+        self.assertTrue(full['downsampled'])
+        self.assertIsNone(store.query('concrete'))
+
+    def test_explicit_resolution_is_bounded(self):
+        store = RollupStore()
+        start = date(2018, 1, 1)
+        for i in range(3000):
+            store.add('steel', start + timedelta(days=i), 180 + i % 17)
+        # 3000 days does not fit 4 * 50 daily or weekly buckets, so months are served
+        data = store.query('steel', resolution='day', max_points=50)
+        self.assertEqual(data['resolution'], 'month')
+        self.assertLessEqual(data['points'], 50)
+        # a short range keeps the requested resolution
+        self.assertEqual(store.query('steel', days=90, resolution='day')['resolution'], 'day')
+        # even monthly buckets are trimmed to the most recent 4 * max_points
+        data = store.query('steel', resolution='month', max_points=3)
+        self.assertEqual(data['start'], '2025-04-01')
+        self.assertEqual(data['points'], 3)
+        with self.assertRaises(ValueError):
+            store.query('steel', resolution='hour')
+        # a range far longer than the history is the same as 'all'
+        huge = store.query('steel', days=parse_range('99999999y'), resolution='day', max_points=50)
+        self.assertEqual(huge, store.query('steel', resolution='day', max_points=50))
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('6m'), 180)
+        self.assertIsNone(parse_range('all'))
+        with self.assertRaises(ValueError):
+            parse_range('soon')
+        with self.assertRaises(ValueError):
+            parse_range('0d')
+
+
+if __name__ == '__main__':
+    unittest.main()